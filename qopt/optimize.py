@@ -89,7 +89,7 @@ class Optimizer(ABC):
         The shape of the control amplitudes is saved and used for the
         cost functions while the optimization function might need them flatted.
 
-    cost_fktn_weights: list of float, optional
+    cost_fktn_weights: numpy array of float, optional
         The cost functions are multiplied with these weights during the
         optimisation.
 
@@ -126,15 +126,30 @@ class Optimizer(ABC):
 
         self.cost_fktn_weights = cost_fktn_weights
 
-        if self.cost_fktn_weights is not None:
-            self.cost_fktn_weights = np.asarray(
-                self.cost_fktn_weights).flatten()
-            if len(self.cost_fktn_weights) == 0:
-                self.cost_fktn_weights = None
+    @property
+    def cost_fktn_weights(self):
+        """Weights of the cost functions or None. """
+        return self._cost_fktn_weights
+
+    @cost_fktn_weights.setter
+    def cost_fktn_weights(self, new_weights):
+        """Validates the weights and stores them as float array. """
+        if new_weights is not None:
+            new_weights = np.asarray(new_weights, dtype=np.float64).flatten()
+            if len(new_weights) == 0:
+                new_weights = None
             elif not len(self.system_simulator.cost_fktns) == len(
-                    self.cost_fktn_weights):
+                    new_weights):
                 raise ValueError('A cost function weight must be specified for'
                                  'each cost function or for none at all.')
+        self._cost_fktn_weights = new_weights
+
+        # Weights applied unconditionally to the costs. A single weight of
+        # one broadcasts to any number of costs.
+        if new_weights is None:
+            self._weights = np.ones(1)
+        else:
+            self._weights = new_weights
 
     def cost_fktn_wrapper(self, optimization_parameters):
         """Wraps the cost function given by the simulator class.
@@ -152,30 +167,12 @@ class Optimizer(ABC):
             Cost values.
 
         """
-        if (time.time() - self._opt_start_time) \
-                > self.termination_conditions['max_wall_time']:
-            raise WallTimeExceeded
+        self._check_wall_time()
 
         costs = self.system_simulator.wrapped_cost_functions(
             optimization_parameters.reshape(self.pulse_shape[::-1]).T)
 
-        if self.save_intermediary_steps:
-            self.optim_iter_summary.iter_num += 1
-            self.optim_iter_summary.costs.append(costs)
-            self.optim_iter_summary.parameters.append(
-                optimization_parameters.reshape(self.pulse_shape[::-1]).T
-            )
-        if np.linalg.norm(costs) < np.linalg.norm(self._min_costs):
-            self._min_costs = costs
-            self._min_costs_par = optimization_parameters.reshape(
-                self.pulse_shape[::-1]).T
-
-        # apply the cost function weights after saving the values.
-        if self.cost_fktn_weights is not None:
-            costs *= self.cost_fktn_weights
-
-        self._n_cost_fkt_eval += 1
-        return costs
+        return self._record_costs(optimization_parameters, costs)
 
     def cost_jacobian_wrapper(self, optimization_parameters):
         """Wraps the cost Jacobian function given by the simulator class.
@@ -196,6 +193,64 @@ class Optimizer(ABC):
         jacobian = self.system_simulator.wrapped_jac_function(
             optimization_parameters.reshape(self.pulse_shape[::-1]).T)
 
+        return self._record_jacobian(jacobian)
+
+    def cost_and_jacobian_wrapper(self, optimization_parameters):
+        """Wraps the joint evaluation of the costs and their Jacobian.
+
+        The solvers are set only once for both evaluations. The relevant
+        information for the analysis is saved.
+
+        Parameters
+        ----------
+        optimization_parameters: np.array
+            Raw optimization parameters in a linear array.
+
+        Returns
+        -------
+        costs: np.array, shape (n_fun)
+            Cost values.
+
+        jacobian: np.array, shape (num_func, num_t * num_amp)
+            Jacobian of the cost functions.
+
+        """
+        self._check_wall_time()
+
+        costs, jacobian = self.system_simulator.wrapped_value_and_grad(
+            optimization_parameters.reshape(self.pulse_shape[::-1]).T)
+
+        return (self._record_costs(optimization_parameters, costs),
+                self._record_jacobian(jacobian))
+
+    def _check_wall_time(self):
+        """Raises WallTimeExceeded if the time limit has been exceeded. """
+        if (time.time() - self._opt_start_time) \
+                > self.termination_conditions['max_wall_time']:
+            raise WallTimeExceeded
+
+    def _record_costs(self, optimization_parameters, costs):
+        """Saves the costs for the analysis and applies the weights. """
+        if self.save_intermediary_steps:
+            self.optim_iter_summary.iter_num += 1
+            self.optim_iter_summary.costs.append(costs)
+            self.optim_iter_summary.parameters.append(
+                optimization_parameters.reshape(self.pulse_shape[::-1]).T
+            )
+        if np.linalg.norm(costs) < np.linalg.norm(self._min_costs):
+            self._min_costs = costs
+            self._min_costs_par = optimization_parameters.reshape(
+                self.pulse_shape[::-1]).T
+
+        # apply the cost function weights after saving the values.
+        costs *= self._weights
+
+        self._n_cost_fkt_eval += 1
+        return costs
+
+    def _record_jacobian(self, jacobian):
+        """Saves the Jacobian for the analysis, reshapes it for the scipy
+        optimizers and applies the weights. """
         if self.save_intermediary_steps:
             self.optim_iter_summary.gradients.append(jacobian)
 
@@ -204,10 +259,10 @@ class Optimizer(ABC):
         jacobian = jacobian.reshape(
             (jacobian.shape[0], jacobian.shape[1] * jacobian.shape[2]))
 
-        # apply the cost function weights after saving the values.
-        if self.cost_fktn_weights is not None:
-            jacobian = np.einsum('ab, a -> ab', jacobian,
-                                 self.cost_fktn_weights)
+        # apply the cost function weights after saving the values. The
+        # Jacobian is only copied if there are weights.
+        if self._cost_fktn_weights is not None:
+            jacobian = jacobian * self._weights[:, np.newaxis]
 
         self._n_jac_fkt_eval += 1
         return jacobian
@@ -441,21 +496,42 @@ class ScalarMinimizingOptimizer(Optimizer):
         grad = (np.sum(jac, axis=0))
         return grad
 
+    def cost_and_jacobian_wrapper(self, optimization_parameters):
+        """ The total cost function and its gradient.
+
+        Both are evaluated at once so that scipy's minimize can be called
+        with jac=True.
+
+        Returns
+        -------
+        scalar_costs: float
+            The sum of the costs.
+
+        gradient: numpy array, shape (num_t * num_amp)
+            The gradient of the costs in the 2 norm.
+
+        """
+        costs, jac = super().cost_and_jacobian_wrapper(optimization_parameters)
+        return np.sum(costs), np.sum(jac, axis=0)
+
     def run_optimization(self, initial_control_amplitudes: np.array) \
             -> optimization_data.OptimizationResult:
         """See base class. """
         super().prepare_optimization(
             initial_optimization_parameters=initial_control_amplitudes)
 
+        # the costs and the gradient are evaluated together
         if self.use_jacobian_function:
-            jac = self.cost_jacobian_wrapper
+            fun = self.cost_and_jacobian_wrapper
+            jac = True
         else:
+            fun = self.cost_fktn_wrapper
             jac = None
 
         if self.method == 'L-BFGS-B':
             try:
                 result = scipy.optimize.minimize(
-                    fun=self.cost_fktn_wrapper,
+                    fun=fun,
                     x0=initial_control_amplitudes.T.flatten(),
                     jac=jac,
                     bounds=self.bounds,
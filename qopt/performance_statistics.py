@@ -33,10 +33,22 @@ References
 
 """
 
+import numpy as np
+
 
 class PerformanceStatistics(object):
     """Stores performance statistics.
 
+    The evaluation times are written into preallocated arrays, whose length
+    is doubled when they are full. If the number of cost functions changes,
+    then the evaluations with fewer cost functions are padded with zeros.
+
+    Parameters
+    ----------
+    estimated_steps: int, optional
+        The number of evaluations for which memory is allocated initially.
+        Defaults to 1000.
+
     Attributes
     ----------
     start_t_opt: float or None
@@ -48,16 +60,155 @@ class PerformanceStatistics(object):
     indices : List[str]
         The indices of the cost functions.
 
-    cost_func_eval_times: list of float
-        List of durations of the evaluation of the cost functions.
+    cost_func_eval_times: numpy array, shape (n_evaluations, n_cost_fktns)
+        Durations of the evaluation of the cost functions.
 
-    grad_func_eval_times: list of float
-        List of durations of the evaluation of the gradients.
+    grad_func_eval_times: numpy array, shape (n_evaluations, n_cost_fktns)
+        Durations of the evaluation of the gradients.
 
     """
-    def __init__(self):
+    def __init__(self, estimated_steps: int = 1000):
         self.start_t_opt = None
         self.end_t_opt = None
         self.indices = None
-        self.cost_func_eval_times = []
-        self.grad_func_eval_times = []
+        self._estimated_steps = estimated_steps
+        self._cost_func_eval_times = np.zeros((0, 0))
+        self._n_cost_func_evals = 0
+        self._grad_func_eval_times = np.zeros((0, 0))
+        self._n_grad_func_evals = 0
+
+    @property
+    def cost_func_eval_times(self) -> np.ndarray:
+        """Durations of the evaluation of the cost functions. """
+        return self._cost_func_eval_times[:self._n_cost_func_evals]
+
+    @property
+    def grad_func_eval_times(self) -> np.ndarray:
+        """Durations of the evaluation of the gradients. """
+        return self._grad_func_eval_times[:self._n_grad_func_evals]
+
+    def new_cost_func_eval(self, n_cost_fktns: int) -> np.ndarray:
+        """Reserves the entries for the next evaluation of the cost functions.
+
+        Parameters
+        ----------
+        n_cost_fktns: int
+            The number of cost functions.
+
+        Returns
+        -------
+        eval_times: numpy array, shape (n_cost_fktns)
+            The entries to which the durations are written in seconds.
+
+        """
+        self._cost_func_eval_times = _reserve_row(
+            self._cost_func_eval_times, self._n_cost_func_evals,
+            n_cost_fktns, self._estimated_steps)
+        self._n_cost_func_evals += 1
+        return self._cost_func_eval_times[self._n_cost_func_evals - 1,
+                                          :n_cost_fktns]
+
+    def new_grad_func_eval(self, n_cost_fktns: int) -> np.ndarray:
+        """Reserves the entries for the next evaluation of the gradients.
+
+        Parameters
+        ----------
+        n_cost_fktns: int
+            The number of cost functions.
+
+        Returns
+        -------
+        eval_times: numpy array, shape (n_cost_fktns)
+            The entries to which the durations are written in seconds.
+
+        """
+        self._grad_func_eval_times = _reserve_row(
+            self._grad_func_eval_times, self._n_grad_func_evals,
+            n_cost_fktns, self._estimated_steps)
+        self._n_grad_func_evals += 1
+        return self._grad_func_eval_times[self._n_grad_func_evals - 1,
+                                          :n_cost_fktns]
+
+    def __getstate__(self) -> dict:
+        """Pickles only the recorded rows of the preallocated arrays. """
+        state = self.__dict__.copy()
+        state['_cost_func_eval_times'] = self.cost_func_eval_times.copy()
+        state['_grad_func_eval_times'] = self.grad_func_eval_times.copy()
+        return state
+
+    def __setstate__(self, state: dict):
+        """Restores pickled statistics, which were recorded in lists by
+        earlier versions. """
+        state = dict(state)
+        state.setdefault('_estimated_steps', 1000)
+        for name in ['cost_func_eval_times', 'grad_func_eval_times']:
+            if name in state:
+                eval_times = _legacy_to_array(state.pop(name))
+                state['_' + name] = eval_times
+                state['_n_' + name[:-len('_eval_times')] + '_evals'] = \
+                    eval_times.shape[0]
+        self.__dict__.update(state)
+
+
+def _reserve_row(buffer: np.ndarray, n_rows: int, n_columns: int,
+                 estimated_rows: int) -> np.ndarray:
+    """ Makes sure that the buffer has space for one more row.
+
+    Parameters
+    ----------
+    buffer: numpy array, shape (n_allocated, n_allocated_columns)
+        The preallocated array.
+
+    n_rows: int
+        The number of rows in use.
+
+    n_columns: int
+        The number of columns of the new row. If the number of cost functions
+        has changed, then the rows with fewer columns are padded with zeros.
+
+    estimated_rows: int
+        The number of rows allocated for the first row.
+
+    Returns
+    -------
+    buffer: numpy array
+        The same buffer or a copy, which is at least twice as long if the
+        buffer was full and wider if the new row has more columns.
+
+    """
+    n_allocated = buffer.shape[0]
+    if n_rows == n_allocated:
+        n_allocated = max(estimated_rows, 2 * n_rows, 1)
+    n_allocated_columns = max(buffer.shape[1], n_columns)
+
+    if (n_allocated, n_allocated_columns) != buffer.shape:
+        new_buffer = np.zeros((n_allocated, n_allocated_columns))
+        new_buffer[:n_rows, :buffer.shape[1]] = buffer[:n_rows]
+        return new_buffer
+
+    return buffer
+
+
+def _legacy_to_array(eval_times: list) -> np.ndarray:
+    """ Converts a list of evaluation times to an array.
+
+    Parameters
+    ----------
+    eval_times: list of list of float
+        The durations of each evaluation as recorded by earlier versions.
+
+    Returns
+    -------
+    eval_times: numpy array, shape (n_evaluations, n_cost_fktns)
+        The durations. Rows of evaluations with fewer cost functions are
+        padded with zeros.
+
+    """
+    if len(eval_times) == 0:
+        return np.zeros((0, 0))
+    rows = [np.atleast_1d(np.asarray(row, dtype=np.float64))
+            for row in eval_times]
+    array = np.zeros((len(rows), max(len(row) for row in rows)))
+    for i, row in enumerate(rows):
+        array[i, :len(row)] = row
+    return array
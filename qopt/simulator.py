@@ -51,9 +51,12 @@ References
 
 """
 
-from typing import Optional, Sequence
+from typing import Optional, Sequence, Union
+from multiprocessing import Pool
+import os
 import numpy as np
 import time
+import warnings
 
 from qopt import cost_functions, performance_statistics, solver_algorithms
 
@@ -73,7 +76,8 @@ class Simulator(object):
         consideration.
 
     cost_fktns: List[FidelityComputer]
-        These are the parameters which are optimized.
+        These are the parameters which are optimized. Each cost function must
+        return either a scalar or a one dimensional array of fixed size.
 
     optimization_parameters: numpy array, optional
         The initial pulse of shape (N_t, N_c) where N_t is the
@@ -92,6 +96,13 @@ class Simulator(object):
         If True, then the evaluation times of the cost functions and their
         gradients are stored.
 
+    warmup: bool, optional
+        If True and optimization parameters are given, then the cost functions
+        and their Jacobian are evaluated once at construction, so that
+        one-time initialisations do not slow down the first optimization
+        step. Errors in this evaluation are turned into warnings.
+        Defaults to True.
+
     Attributes
     ----------
     solvers: list of `Solver`
@@ -113,6 +124,10 @@ class Simulator(object):
 
     """
 
+    # memory in bytes of the perturbed pulses held at a time by the numeric
+    # gradient, unless a chunk size is given
+    numeric_gradient_chunk_bytes = 2 ** 26
+
     def __init__(
             self,
             solvers: Optional[Sequence[solver_algorithms.Solver]],
@@ -122,7 +137,8 @@ class Simulator(object):
             times=None,
             num_times=None,
             record_performance_statistics: bool = True,
-            numeric_jacobian: bool = False
+            numeric_jacobian: bool = False,
+            warmup: bool = True
     ):
         self._num_ctrl = num_ctrl
         self._num_times = num_times
@@ -130,13 +146,59 @@ class Simulator(object):
         self._times = times
 
         self.solvers = solvers
-        self.cost_fktns = cost_fktns
+
+        # number of costs returned by each cost function, which is determined
+        # by the first evaluation of the costs or the Jacobian, and the cost
+        # functions it was determined for
+        self._cost_sizes = None
+        self._cost_sizes_fktns = []
 
         self.stats = (performance_statistics.PerformanceStatistics()
                       if record_performance_statistics else None)
 
+        self._cost_fktns = None
+        self.cost_fktns = cost_fktns
+
         self.numeric_jacobian = numeric_jacobian
 
+        if warmup and optimization_parameters is not None:
+            self._warm_up()
+
+    def _warm_up(self):
+        """Evaluates the cost functions and their Jacobian for the pulse
+        without recording performance statistics.
+
+        The Jacobian is skipped if it is calculated numerically and also if
+        a cost function does not implement its gradient.
+
+        """
+        stats = self.stats
+        self.stats = None
+        try:
+            self.wrapped_cost_functions(self.pulse)
+            if not self.numeric_jacobian:
+                try:
+                    self.wrapped_jac_function(self.pulse)
+                except NotImplementedError:
+                    pass
+        except Exception as error:
+            warnings.warn('The warm up evaluation of the simulator failed: '
+                          + repr(error))
+        finally:
+            self.stats = stats
+
+    @property
+    def cost_fktns(self):
+        """Cost functions evaluated by the simulator. """
+        return self._cost_fktns
+
+    @cost_fktns.setter
+    def cost_fktns(self, new_cost_fktns):
+        """Sets the cost functions and resets their cached sizes. """
+        self._cost_fktns = new_cost_fktns
+        self._cost_sizes = None
+        self._cost_sizes_fktns = []
+
     @property
     def pulse(self):
         """Optimization parameters. """
@@ -161,6 +223,18 @@ class Simulator(object):
                 'The shape of self.pulse does not fit to the number of times'
                 ' and control amplitudes!')
 
+    def _set_optimization_parameters(self, pulse: np.ndarray) -> None:
+        """Sets the optimization parameters once in each distinct solver.
+
+        The solvers themselves skip unchanged parameters.
+
+        """
+        set_solvers = set()
+        for solver in self.solvers:
+            if id(solver) not in set_solvers:
+                solver.set_optimization_parameters(pulse)
+                set_solvers.add(id(solver))
+
     @property
     def cost_indices(self):
         """Indices of cost functions. """
@@ -194,35 +268,118 @@ class Simulator(object):
         """
         if pulse is None:
             pulse = self.pulse
+        pulse = np.ascontiguousarray(pulse, dtype=np.float64)
 
-        for solver in self.solvers:
-            solver.set_optimization_parameters(pulse)
-
-        costs = []
+        self._set_optimization_parameters(pulse)
 
         if self.stats:
-            self.stats.cost_func_eval_times.append([])
+            raw_costs = []
+            eval_times = self.stats.new_cost_func_eval(len(self.cost_fktns))
             for i, cost_fktn in enumerate(self.cost_fktns):
-                t_start = time.time()
-                cost = cost_fktn.costs()
-                t_end = time.time()
-                self.stats.cost_func_eval_times[-1].append(t_end - t_start)
-
-                if hasattr(cost, "__len__"):
-                    costs.append(cost)
-                else:
-                    costs.append(cost.reshape(1))
-            costs = np.concatenate(costs, axis=0)
+                t_start = time.perf_counter_ns()
+                raw_costs.append(cost_fktn.costs())
+                # the durations are converted from nanoseconds to seconds
+                eval_times[i] = 1e-9 * (time.perf_counter_ns() - t_start)
         else:
-            for i, cost_fktn in enumerate(self.cost_fktns):
-                cost = cost_fktn.costs()
-                if hasattr(cost, "__len__"):
-                    costs.append(cost)
-                else:
-                    costs.append(cost.reshape(1))
-            costs = np.concatenate(costs, axis=0)
+            raw_costs = [cost_fktn.costs() for cost_fktn in self.cost_fktns]
+
+        cost_sizes = self._cached_cost_sizes()
+        if cost_sizes is None:
+            cost_sizes = [np.size(cost) for cost in raw_costs]
+            self._cache_cost_sizes(cost_sizes)
+        return _assemble_costs(raw_costs, cost_sizes)
+
+    def _cached_cost_sizes(self) -> Optional[list]:
+        """The cached number of costs of each cost function.
+
+        None if the sizes have not been determined yet or if the list of cost
+        functions has been changed in place since, for example by appending or
+        replacing a cost function.
+
+        """
+        if len(self._cost_sizes_fktns) != len(self.cost_fktns) or not all(
+                cached is cost_fktn for cached, cost_fktn
+                in zip(self._cost_sizes_fktns, self.cost_fktns)):
+            return None
+        return self._cost_sizes
+
+    def _cache_cost_sizes(self, cost_sizes: list) -> None:
+        """Caches the number of costs of each current cost function. """
+        self._cost_sizes = cost_sizes
+        self._cost_sizes_fktns = list(self.cost_fktns)
+
+    def wrapped_cost_functions_batch(
+            self, pulses: np.ndarray,
+            processes: Optional[int] = 1,
+            pool: Optional[Pool] = None
+    ) -> np.ndarray:
+        """
+        Evaluates the cost functions for a batch of pulses.
+
+        Parameters
+        ----------
+        pulses: numpy array, shape (n_batch, num_t, num_ctrl)
+            The pulses stacked along the leading axis.
+
+        processes: int, optional
+            If an integer is given, then the batch is split and evaluated in
+            this number of parallel processes. If 1 then no parallel
+            computing is applied. If None then cpu_count() is called to use
+            all cores available. Defaults to 1. Each process works on its own
+            copy of the simulator, hence the evaluation times of parallel
+            evaluations are not recorded in the performance statistics.
+
+        pool: Pool, optional
+            A pool of worker processes created by `create_worker_pool`, which
+            is reused for several batches. If None and processes is not 1,
+            then a pool is created for this batch only. Defaults to None.
+
+        Returns
+        -------
+        costs: numpy array, shape (n_batch, n_fun)
+            The costs for each pulse of the batch.
+
+        """
+        pulses = np.ascontiguousarray(pulses, dtype=np.float64)
+
+        if processes is None:
+            processes = os.cpu_count()
+
+        if processes == 1 or len(pulses) == 1:
+            return np.stack(
+                [self.wrapped_cost_functions(pulse) for pulse in pulses],
+                axis=0)
+
+        if pool is None:
+            with self.create_worker_pool(processes) as pool:
+                return self.wrapped_cost_functions_batch(
+                    pulses, processes=processes, pool=pool)
+
+        chunks = np.array_split(pulses, min(processes, len(pulses)))
+        return np.concatenate(pool.map(_evaluate_cost_batch, chunks), axis=0)
+
+    def create_worker_pool(self, processes: Optional[int] = None) -> Pool:
+        """
+        Creates a pool of worker processes for the evaluation of batches.
+
+        The simulator is sent once to each worker at its start, so the pool
+        evaluates the costs of the simulator in its state at the creation of
+        the pool.
+
+        Parameters
+        ----------
+        processes: int, optional
+            The number of worker processes. If None then cpu_count() is
+            called to use all cores available. Defaults to None.
 
-        return np.asarray(costs)
+        Returns
+        -------
+        pool: Pool
+            The pool of worker processes.
+
+        """
+        return Pool(processes=processes, initializer=_initialize_worker,
+                    initargs=(self, ))
 
     def wrapped_jac_function(self, pulse=None):
         """
@@ -245,47 +402,97 @@ class Simulator(object):
 
         if pulse is None:
             pulse = self.pulse
+        pulse = np.ascontiguousarray(pulse, dtype=np.float64)
 
-        for solver in self.solvers:
-            solver.set_optimization_parameters(pulse)
+        self._set_optimization_parameters(pulse)
 
+        # The jacobians are written into a preallocated array once the
+        # number of costs of each cost function is known.
+        cost_sizes = self._cached_cost_sizes()
         jacobians = []
+        total_jac = None
+        offset = 0
+
+        if self.stats:
+            cost_fktn_jacobians = self._jac_loop_timed()
+        else:
+            cost_fktn_jacobians = self._jac_loop_untimed()
+
+        for i, jac_x_transferred in enumerate(cost_fktn_jacobians):
+            if cost_sizes is None:
+                jacobians.append(jac_x_transferred)
+            else:
+                if total_jac is None:
+                    total_jac = np.empty(
+                        (jac_x_transferred.shape[0], sum(cost_sizes),
+                         jac_x_transferred.shape[2]),
+                        dtype=jac_x_transferred.dtype)
+                total_jac[:, offset:offset + cost_sizes[i], :] = \
+                    jac_x_transferred
+                offset += cost_sizes[i]
+
+        if cost_sizes is None:
+            self._cache_cost_sizes([jac.shape[1] for jac in jacobians])
+            total_jac = np.concatenate(jacobians, axis=1)
 
-        record_evaluation_times = bool(self.stats)
+        return total_jac
 
-        if record_evaluation_times:
-            self.stats.grad_func_eval_times.append([])
+    def wrapped_value_and_grad(self, pulse=None):
+        """
+        Evaluates the cost functions and their Jacobian for the same pulse.
 
-        for i, cost_fktn in enumerate(self.cost_fktns):
-            if record_evaluation_times:
-                t_start = time.time()
-            jac_u = cost_fktn.grad()
-
-            # if the cost function is scalar, an extra dimension is inserted
-            if len(jac_u.shape) == 2:
-                jac_u = np.expand_dims(jac_u, axis=1)
-
-            # apply the chain rule to the derivatives
-            jac_x = cost_fktn.solver.amplitude_function.derivative_by_chain_rule(
-                jac_u, cost_fktn.solver.transfer_function(pulse))
-            jac_x_transferred = \
-                cost_fktn.solver.transfer_function.gradient_chain_rule(
-                    jac_x
-                )
-            jacobians.append(jac_x_transferred)
-            if record_evaluation_times:
-                t_end = time.time()
-                self.stats.grad_func_eval_times[-1].append(t_end - t_start)
-
-        # two dimensional form as required by scipy solvers
-        total_jac = np.concatenate(jacobians, axis=1)
+        The pulse is set only once in the solvers, so that the propagators
+        are shared by both evaluations.
 
-        return total_jac
+        Parameters
+        ----------
+        pulse: numpy array, optional
+            shape: (num_t, num_ctrl) If no pulse is specified the cost function
+            is evaluated for the attribute pulse.
+
+        Returns
+        -------
+        costs: numpy array, shape (n_fun)
+            Array of costs (i.e. infidelities).
+
+        jac: numpy array
+            Array of gradients of shape (num_t, num_func, num_amp).
+
+        """
+        if pulse is None:
+            pulse = self.pulse
+        pulse = np.ascontiguousarray(pulse, dtype=np.float64)
+
+        costs = self.wrapped_cost_functions(pulse)
+        jac = self.wrapped_jac_function(pulse)
+        return costs, jac
+
+    def _jac_loop_untimed(self):
+        """Yields the Jacobian of each cost function w.r.t. the pulse. """
+        for cost_fktn in self.cost_fktns:
+            yield _cost_fktn_jacobian(cost_fktn)
+
+    def _jac_loop_timed(self):
+        """Yields the Jacobian of each cost function w.r.t. the pulse and
+        records the evaluation times in the performance statistics. """
+        eval_times = self.stats.new_grad_func_eval(len(self.cost_fktns))
+        for i, cost_fktn in enumerate(self.cost_fktns):
+            t_start = time.perf_counter_ns()
+            jac_x_transferred = _cost_fktn_jacobian(cost_fktn)
+            # the durations are converted from nanoseconds to seconds
+            eval_times[i] = 1e-9 * (time.perf_counter_ns() - t_start)
+            yield jac_x_transferred
 
     def compare_numeric_to_analytic_gradient(
             self, pulse: Optional[np.ndarray] = None,
-            delta_eps: float = 1e-8,
-            symmetric: bool = False
+            delta_eps: Union[float, str, None] = None,
+            symmetric: bool = False,
+            processes: Optional[int] = 1,
+            mode: str = 'full',
+            richardson: bool = False,
+            chunk_size: Optional[int] = None,
+            rng=None,
+            central_costs: Optional[np.ndarray] = None
     ):
         """
         This function compares the numerical to the analytical gradient in order
@@ -296,13 +503,48 @@ class Simulator(object):
         pulse: array
             The pulse at which the gradient is evaluated.
 
-        delta_eps: float
-            The finite difference.
+        delta_eps: float, 'auto' or None
+            The finite difference. See `numeric_gradient`.
 
         symmetric: bool
             If True, then the finite differences are evaluated symmetrically
             around the pulse. Otherwise by forward finite differences.
 
+        processes: int, optional
+            Number of parallel processes used for the evaluation of the
+            numeric gradient. See `wrapped_cost_functions_batch`. Defaults
+            to 1.
+
+        mode: str, optional
+            If 'full', then the complete Jacobian is calculated by finite
+            differences, which requires a cost function evaluation for each
+            entry of the pulse. If 'directional', then only the derivative in
+            a random direction v is compared to the projection of the
+            analytic Jacobian onto v, which requires only two cost function
+            evaluations. Defaults to 'full'.
+
+        richardson: bool, optional
+            If True, then the numeric gradient is calculated by the four point
+            Richardson extrapolation. See `numeric_gradient`. Only applies to
+            the mode 'full'. Defaults to False.
+
+        chunk_size: int, optional
+            Maximal number of perturbed pulses held in memory at a time. If
+            None, it is limited by `numeric_gradient_chunk_bytes`. See
+            `numeric_gradient`. Only applies to the mode 'full'. Defaults to
+            None.
+
+        rng: numpy.random.Generator or int, optional
+            Random number generator or seed used to draw the direction in the
+            mode 'directional'. Passed to `numpy.random.default_rng`, so the
+            global random state is left untouched. Defaults to None.
+
+        central_costs: numpy array, optional
+            The costs of the unperturbed pulse for forward finite
+            differences. A sweep over finite differences at the same pulse
+            can pass them to avoid their repeated evaluation. See
+            `numeric_gradient`. Defaults to None.
+
         Returns
         -------
         gradient_difference_norm: float
@@ -314,10 +556,22 @@ class Simulator(object):
             and the average norm of the numeric and analytic gradient.
 
         """
-        numeric_gradient = self.numeric_gradient(pulse=pulse,
-                                                 delta_eps=delta_eps,
-                                                 symmetric=symmetric)
-        analytic_gradient = self.wrapped_jac_function(pulse=pulse)
+        if mode == 'full':
+            numeric_gradient = self.numeric_gradient(
+                pulse=pulse, delta_eps=delta_eps, symmetric=symmetric,
+                processes=processes, richardson=richardson,
+                chunk_size=chunk_size, central_costs=central_costs)
+            analytic_gradient = self.wrapped_jac_function(pulse=pulse)
+        elif mode == 'directional':
+            numeric_gradient, analytic_gradient = \
+                self._directional_gradients(pulse=pulse,
+                                            delta_eps=delta_eps,
+                                            symmetric=symmetric,
+                                            rng=rng,
+                                            central_costs=central_costs)
+        else:
+            raise ValueError("The mode must be either 'full' or "
+                             "'directional'!")
 
         diff_norm = np.linalg.norm(numeric_gradient - analytic_gradient)
         relative_difference = 2 * diff_norm \
@@ -325,10 +579,79 @@ class Simulator(object):
                + np.linalg.norm(analytic_gradient))
         return diff_norm, relative_difference
 
+    def _directional_gradients(
+            self, pulse: Optional[np.ndarray] = None,
+            delta_eps: Union[float, str, None] = None,
+            symmetric: bool = False,
+            rng=None,
+            central_costs: Optional[np.ndarray] = None
+    ):
+        """
+        Calculates the derivative of the costs in a random direction.
+
+        The direction v is drawn from a standard normal distribution.
+
+        Parameters
+        ----------
+        pulse: array
+            The pulse at which the gradient is evaluated.
+
+        delta_eps: float, 'auto' or None
+            The finite difference. See `numeric_gradient`.
+
+        symmetric: bool
+            If True, then the finite differences are evaluated symmetrically
+            around the pulse. Otherwise by forward finite differences.
+
+        rng: numpy.random.Generator or int, optional
+            Random number generator or seed for the direction v.
+
+        central_costs: numpy array, optional
+            The costs of the unperturbed pulse for forward finite
+            differences.
+
+        Returns
+        -------
+        numeric_derivative: array, shape (n_func)
+            The derivative in the direction v by finite differences.
+
+        analytic_derivative: array, shape (n_func)
+            The analytic Jacobian contracted with v.
+
+        """
+        if pulse is None:
+            pulse = self.pulse
+
+        direction = np.random.default_rng(rng).standard_normal(pulse.shape)
+
+        delta_eps = _step_size(delta_eps, pulse, order=2 if symmetric else 1)
+
+        if symmetric:
+            fwd_val, bck_val = self.wrapped_cost_functions_batch(
+                np.stack([pulse + delta_eps * direction,
+                          pulse - delta_eps * direction], axis=0))
+            numeric_derivative = (fwd_val - bck_val) / (2 * delta_eps)
+        else:
+            if central_costs is None:
+                central_costs = self.wrapped_cost_functions(pulse)
+            fwd_val = self.wrapped_cost_functions(
+                pulse + delta_eps * direction)
+            numeric_derivative = (fwd_val - central_costs) / delta_eps
+
+        analytic_derivative = np.einsum(
+            'tfc,tc->f', self.wrapped_jac_function(pulse=pulse), direction)
+
+        return numeric_derivative, analytic_derivative
+
     def numeric_gradient(
             self, pulse: Optional[np.ndarray] = None,
-            delta_eps: float = 1e-8,
-            symmetric: bool = False
+            delta_eps: Union[float, str, None] = None,
+            symmetric: bool = False,
+            processes: Optional[int] = 1,
+            richardson: bool = False,
+            dtype: type = np.float64,
+            chunk_size: Optional[int] = None,
+            central_costs: Optional[np.ndarray] = None
     ) -> np.ndarray:
         """
         This function calculates the gradient numerically and analytically
@@ -339,13 +662,50 @@ class Simulator(object):
         pulse: array
             The pulse at which the gradient is evaluated.
 
-        delta_eps: float
-            The finite difference.
+        delta_eps: float, 'auto' or None
+            The finite difference. If 'auto', then the step size balancing
+            the truncation and the rounding error of the chosen finite
+            difference scheme is used. If None, then the automatic step
+            size is used for the Richardson extrapolation, whose accuracy is
+            otherwise limited by the rounding error, and 1e-8 for the
+            forward and symmetric finite differences. Defaults to None.
 
         symmetric: bool
             If True, then the finite differences are evaluated symmetrically
             around the pulse. Otherwise by forward finite differences.
 
+        processes: int, optional
+            Number of parallel processes used for the evaluation of the
+            perturbed pulses. See `wrapped_cost_functions_batch`. Defaults
+            to 1.
+
+        richardson: bool, optional
+            If True, then the four point Richardson extrapolation
+            (-f(x+2h) + 8f(x+h) - 8f(x-h) + f(x-2h)) / 12h is used, whose
+            error is of fourth order in the step size h. Supersedes
+            symmetric. Defaults to False.
+
+        dtype: numpy dtype, optional
+            Data type of the returned gradients. A lower precision like
+            np.float32 halves the memory of the gradients for large pulses.
+            The pulses and the differences of the costs are always computed
+            in double precision, because the finite differences are
+            typically below the resolution of single precision. Defaults to
+            np.float64.
+
+        chunk_size: int, optional
+            At most this number of perturbed pulses is held in memory at a
+            time. The batch of all n_time * n_opers perturbed pulses grows
+            quadratically with the number of parameters, so by default it is
+            split into chunks of at most `numeric_gradient_chunk_bytes`
+            bytes. A chunk size of n_time * n_opers evaluates all perturbed
+            pulses as a single batch. Defaults to None.
+
+        central_costs: numpy array, optional
+            The costs of the unperturbed pulse, if they are already known.
+            Only used by forward finite differences, which otherwise evaluate
+            them. Defaults to None.
+
         Returns
         -------
         gradients: array
@@ -356,25 +716,253 @@ class Simulator(object):
             test_pulse = self.pulse
         else:
             test_pulse = pulse
+        test_pulse = np.ascontiguousarray(test_pulse, dtype=np.float64)
+
+        n_times, n_operators = test_pulse.shape
+        n_parameters = n_times * n_operators
+
+        if richardson:
+            order = 4
+            # pairs of (step multiple, weight) of the finite difference stencil
+            stencil = [(2, -1 / 12), (1, 8 / 12), (-1, -8 / 12), (-2, 1 / 12)]
+        elif symmetric:
+            order = 2
+            stencil = [(1, 1 / 2), (-1, -1 / 2)]
+        else:
+            order = 1
+            stencil = [(1, 1)]
 
-        central_costs = self.wrapped_cost_functions(pulse=test_pulse)
+        delta_eps = _step_size(delta_eps, test_pulse, order=order)
 
+        if chunk_size is None:
+            chunk_size = max(
+                1, self.numeric_gradient_chunk_bytes // test_pulse.nbytes)
+
+        if processes is None:
+            processes = os.cpu_count()
+
+        if order == 1 and central_costs is None:
+            central_costs = self.wrapped_cost_functions(pulse=test_pulse)
+
+        # a single pool of workers serves all chunks and stencil points
+        if processes == 1:
+            pool = None
+        else:
+            pool = self.create_worker_pool(min(processes, n_parameters))
+
+        try:
+            gradients = self._chunked_differences(
+                test_pulse, stencil, delta_eps, chunk_size, processes, pool,
+                dtype, central_costs if order == 1 else None)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        return gradients
+
+    def _chunked_differences(
+            self, test_pulse: np.ndarray,
+            stencil: Sequence,
+            delta_eps: float,
+            chunk_size: int,
+            processes: int,
+            pool: Optional[Pool],
+            dtype: type,
+            central_costs: Optional[np.ndarray]
+    ) -> np.ndarray:
+        """Evaluates a finite difference stencil in chunks of parameters.
+
+        See `numeric_gradient` for the parameters. The stencil is a list of
+        pairs of step multiples and weights. The central costs are
+        subtracted for forward differences and None otherwise.
+
+        """
         n_times, n_operators = test_pulse.shape
-        n_cost_funcs = len(central_costs)
-
-        gradients = np.zeros((n_times, n_cost_funcs, n_operators))
-
-        for n_time in range(n_times):
-            for n_operator in range(n_operators):
-                delta = np.zeros_like(test_pulse)
-                delta[n_time, n_operator] = delta_eps
-                fwd_val = self.wrapped_cost_functions(test_pulse + delta)
-                if symmetric:
-                    bck_val = self.wrapped_cost_functions(test_pulse - delta)
-                    gradients[n_time, :, n_operator] = (fwd_val - bck_val) / (
-                            2 * delta_eps)
-                else:
-                    gradients[n_time, :, n_operator] = \
-                        (fwd_val - central_costs) / delta_eps
+        n_parameters = n_times * n_operators
+
+        gradients = None
+        for start in range(0, n_parameters, chunk_size):
+            stop = min(start + chunk_size, n_parameters)
+            parameters = np.arange(start, stop)
+
+            # The k-th pulse in the chunk is perturbed in the parameter
+            # start + k, which corresponds to the time step
+            # (start + k) // n_operators and the operator
+            # (start + k) % n_operators. The perturbations lie on a diagonal
+            # of the flattened batch, where they are changed in place.
+            perturbed_pulses = np.tile(test_pulse, (stop - start, 1, 1))
+            diagonal = (np.arange(stop - start), parameters)
+            flat_pulses = perturbed_pulses.reshape(
+                (stop - start, n_parameters))
+
+            differences = 0
+            current_step = 0
+            for step, weight in stencil:
+                flat_pulses[diagonal] += (step - current_step) * delta_eps
+                current_step = step
+                differences = differences + weight * \
+                    self.wrapped_cost_functions_batch(
+                        perturbed_pulses, processes=processes, pool=pool)
+
+            if central_costs is not None:
+                differences = differences - central_costs[np.newaxis]
+
+            if gradients is None:
+                gradients = np.empty(
+                    (n_times, differences.shape[1], n_operators), dtype=dtype)
+            # shape (n_chunk, n_func) -> (n_time, n_func, n_opers)
+            gradients[parameters // n_operators, :,
+                      parameters % n_operators] = differences / delta_eps
 
         return gradients
+
+
+def _optimal_step_size(pulse: np.ndarray, order: int) -> float:
+    """ Step size of a finite difference scheme.
+
+    A scheme whose truncation error is of the given order in the step size h
+    has a total error of about eps / h + h ** order, where eps is the machine
+    precision. The error is minimal for h of the order of
+    eps ** (1 / (order + 1)), which is scaled by the magnitude of the pulse.
+
+    Parameters
+    ----------
+    pulse: numpy array, shape (num_t, num_ctrl)
+        The pulse at which the gradient is evaluated.
+
+    order: int
+        The order of the truncation error.
+
+    Returns
+    -------
+    delta_eps: float
+        The finite difference.
+
+    """
+    scale = max(1., np.max(np.abs(pulse)))
+    return scale * np.finfo(np.float64).eps ** (1 / (order + 1))
+
+
+def _step_size(delta_eps: Union[float, str, None], pulse: np.ndarray,
+               order: int) -> float:
+    """ Resolves the finite difference passed to the numeric gradient.
+
+    Parameters
+    ----------
+    delta_eps: float, 'auto' or None
+        The finite difference. See `Simulator.numeric_gradient`.
+
+    pulse: numpy array, shape (num_t, num_ctrl)
+        The pulse at which the gradient is evaluated.
+
+    order: int
+        The order of the truncation error of the finite difference scheme.
+
+    Returns
+    -------
+    delta_eps: float
+        The finite difference.
+
+    """
+    if delta_eps is None:
+        delta_eps = 'auto' if order == 4 else 1e-8
+    if isinstance(delta_eps, str):
+        if delta_eps != 'auto':
+            raise ValueError("The finite difference must be a float, 'auto' "
+                             "or None!")
+        delta_eps = _optimal_step_size(pulse, order=order)
+    return delta_eps
+
+
+def _assemble_costs(raw_costs: Sequence,
+                    cost_sizes: Sequence[int]) -> np.ndarray:
+    """ Writes scalar and vector valued costs into a single array.
+
+    Parameters
+    ----------
+    raw_costs: list of float or numpy array
+        The costs returned by each cost function.
+
+    cost_sizes: list of int
+        The number of costs returned by each cost function.
+
+    Returns
+    -------
+    costs: numpy array, shape (n_fun)
+        The costs of all cost functions in a one dimensional array.
+
+    """
+    costs = np.empty(sum(cost_sizes))
+    offset = 0
+    for cost, size in zip(raw_costs, cost_sizes):
+        costs[offset:offset + size] = cost
+        offset += size
+    return costs
+
+
+def _cost_fktn_jacobian(
+        cost_fktn: cost_functions.CostFunction) -> np.ndarray:
+    """ Calculates the Jacobian of a cost function w.r.t. the pulse.
+
+    The chain rule uses the transferred parameters, which the solver has
+    already calculated when the pulse was set.
+
+    Parameters
+    ----------
+    cost_fktn: CostFunction
+        The cost function whose solver is already set to the pulse.
+
+    Returns
+    -------
+    jac: numpy array, shape (num_t, num_func, num_ctrl)
+        The Jacobian of the cost function.
+
+    """
+    jac_u = cost_fktn.grad()
+
+    # if the cost function is scalar, an extra dimension is inserted
+    if len(jac_u.shape) == 2:
+        jac_u = np.expand_dims(jac_u, axis=1)
+
+    # apply the chain rule to the derivatives
+    solver = cost_fktn.solver
+    jac_x = solver.amplitude_function.derivative_by_chain_rule(
+        jac_u, solver.transferred_parameters)
+    jac_x_transferred = solver.transfer_function.gradient_chain_rule(jac_x)
+    return jac_x_transferred
+
+
+# copy of the simulator in a worker process of the pool created by
+# Simulator.numeric_gradient
+_worker_simulator = None
+
+
+def _initialize_worker(simulator: Simulator) -> None:
+    """ Stores the copy of the simulator sent once to a worker process.
+
+    Parameters
+    ----------
+    simulator: Simulator
+        The copy of the simulator used by the worker process.
+
+    """
+    global _worker_simulator
+    _worker_simulator = simulator
+
+
+def _evaluate_cost_batch(pulses: np.ndarray) -> np.ndarray:
+    """ Evaluates a batch of pulses serially in a worker process.
+
+    Parameters
+    ----------
+    pulses: numpy array, shape (n_batch, num_t, num_ctrl)
+        The pulses to be evaluated.
+
+    Returns
+    -------
+    costs: numpy array, shape (n_batch, n_fun)
+        The costs for each pulse of the batch.
+
+    """
+    return _worker_simulator.wrapped_cost_functions_batch(pulses)
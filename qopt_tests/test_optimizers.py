@@ -2,6 +2,7 @@
 
 from qopt import *
 from qopt.examples.rabi_driving import setup as rabi_setup
+from qopt.optimize import Optimizer
 import unittest
 import numpy as np
 
@@ -56,3 +57,98 @@ class TestOptimizers(unittest.TestCase):
         self.assertLess(np.sum(result.final_cost), 1e-4)
         self.assertLess(np.sum(result_no_jac.final_cost), 1e-4)
         self.assertLess(np.sum(result_least_squres.final_cost), 2e-4)
+
+
+def create_optimizer(cost_fktn_weights=None):
+    n_time_steps = 4
+    solver = SchroedingerSolver(
+        h_drift=[.1 * DenseOperator.pauli_z()] * n_time_steps,
+        h_ctrl=[DenseOperator.pauli_x(), DenseOperator.pauli_y()],
+        tau=.25 * np.pi * np.ones(n_time_steps)
+    )
+    simulator = Simulator(
+        solvers=[solver, ],
+        cost_fktns=[
+            OperationInfidelity(solver=solver,
+                                target=DenseOperator.pauli_x()),
+            OperationInfidelity(solver=solver,
+                                target=DenseOperator.pauli_y(),
+                                index=['Infidelity Y'])
+        ]
+    )
+    optimizer = ScalarMinimizingOptimizer(
+        system_simulator=simulator,
+        cost_fktn_weights=cost_fktn_weights,
+    )
+    init_pulse = np.random.RandomState(0).randn(n_time_steps, 2)
+    optimizer.prepare_optimization(init_pulse)
+    return optimizer, init_pulse.T.flatten()
+
+
+class TestCostAndJacobianWrapper(unittest.TestCase):
+    def test_joint_evaluation(self):
+        separate, parameters = create_optimizer(cost_fktn_weights=[1, 2])
+        joint, _ = create_optimizer(cost_fktn_weights=[1, 2])
+
+        costs = separate.cost_fktn_wrapper(parameters)
+        gradient = separate.cost_jacobian_wrapper(parameters)
+        joint_costs, joint_gradient = joint.cost_and_jacobian_wrapper(
+            parameters)
+
+        self.assertAlmostEqual(joint_costs, costs, places=14)
+        np.testing.assert_allclose(joint_gradient, gradient, atol=1e-14)
+
+        # the bookkeeping is the same for both evaluations
+        for optimizer in [separate, joint]:
+            self.assertEqual(optimizer._n_cost_fkt_eval, 1)
+            self.assertEqual(optimizer._n_jac_fkt_eval, 1)
+        separate_summary = separate.optim_iter_summary
+        joint_summary = joint.optim_iter_summary
+        self.assertEqual(joint_summary.iter_num, separate_summary.iter_num)
+        for name in ['costs', 'gradients', 'parameters']:
+            self.assertEqual(len(getattr(joint_summary, name)), 1)
+            np.testing.assert_allclose(getattr(joint_summary, name),
+                                       getattr(separate_summary, name),
+                                       atol=1e-14)
+
+    def test_evaluation_counters_of_optimization(self):
+        optimizer, parameters = create_optimizer()
+        result = optimizer.run_optimization(
+            parameters.reshape(optimizer.pulse_shape[::-1]).T)
+
+        # every evaluation of scipy computes the costs and the gradient
+        self.assertEqual(optimizer._n_cost_fkt_eval, result.num_iter)
+        self.assertEqual(optimizer._n_jac_fkt_eval, result.num_iter)
+        summary = optimizer.optim_iter_summary
+        self.assertEqual(summary.iter_num, result.num_iter)
+        self.assertEqual(len(summary.costs), result.num_iter)
+        self.assertEqual(len(summary.gradients), result.num_iter)
+        self.assertEqual(len(summary.parameters), result.num_iter)
+
+
+class TestCostFunctionWeights(unittest.TestCase):
+    def test_weights_validation(self):
+        optimizer, _ = create_optimizer(cost_fktn_weights=[])
+        self.assertIsNone(optimizer.cost_fktn_weights)
+
+        optimizer.cost_fktn_weights = [1, 2]
+        self.assertEqual(optimizer.cost_fktn_weights.dtype, np.float64)
+
+        with self.assertRaises(ValueError):
+            optimizer.cost_fktn_weights = [1, 2, 3]
+
+    def test_weighted_jacobian(self):
+        optimizer, parameters = create_optimizer()
+        jacobian = Optimizer.cost_jacobian_wrapper(optimizer, parameters)
+        # without weights, the Jacobian is only reshaped
+        reference = optimizer.system_simulator.wrapped_jac_function(
+            parameters.reshape(optimizer.pulse_shape[::-1]).T)
+        np.testing.assert_array_equal(
+            jacobian,
+            reference.transpose([1, 2, 0]).reshape(jacobian.shape))
+
+        optimizer.cost_fktn_weights = [2, -3]
+        weighted_jacobian = Optimizer.cost_jacobian_wrapper(
+            optimizer, parameters)
+        np.testing.assert_allclose(weighted_jacobian[0], 2 * jacobian[0])
+        np.testing.assert_allclose(weighted_jacobian[1], -3 * jacobian[1])
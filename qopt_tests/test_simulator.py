@@ -0,0 +1,406 @@
+"""
+Tests the wrapping of the cost functions and their numeric gradients in the
+Simulator class.
+"""
+
+import copyreg
+import numpy as np
+import pickle
+import unittest
+import warnings
+
+from qopt.matrix import DenseOperator
+from qopt.solver_algorithms import SchroedingerSolver
+from qopt.cost_functions import OperationInfidelity, StateInfidelity
+from qopt.simulator import Simulator
+from qopt.performance_statistics import PerformanceStatistics
+
+sigma_x = DenseOperator.pauli_x()
+sigma_y = DenseOperator.pauli_y()
+sigma_z = DenseOperator.pauli_z()
+
+n_time_steps = 4
+delta_t = .25 * np.pi
+
+up = DenseOperator(np.asarray([[1], [0]]))
+down = DenseOperator(np.asarray([[0], [1]]))
+
+
+def create_simulator():
+    solver = SchroedingerSolver(
+        h_drift=[.1 * sigma_z] * n_time_steps,
+        h_ctrl=[sigma_x, sigma_y],
+        tau=delta_t * np.ones(n_time_steps)
+    )
+    state_solver = SchroedingerSolver(
+        h_drift=[.1 * sigma_z] * n_time_steps,
+        h_ctrl=[sigma_x, sigma_y],
+        tau=delta_t * np.ones(n_time_steps),
+        initial_state=up
+    )
+    operation_infid = OperationInfidelity(
+        solver=solver,
+        target=sigma_x,
+        fidelity_measure='entanglement'
+    )
+    state_infid = StateInfidelity(
+        solver=state_solver,
+        target=down
+    )
+    return Simulator(
+        solvers=[solver, state_solver],
+        cost_fktns=[operation_infid, state_infid]
+    )
+
+
+def looped_numeric_gradient(simulator, pulse, delta_eps):
+    central_costs = simulator.wrapped_cost_functions(pulse)
+    gradients = np.zeros(
+        (pulse.shape[0], len(central_costs), pulse.shape[1]))
+    for n_time in range(pulse.shape[0]):
+        for n_operator in range(pulse.shape[1]):
+            delta = np.zeros_like(pulse)
+            delta[n_time, n_operator] = delta_eps
+            gradients[n_time, :, n_operator] = \
+                (simulator.wrapped_cost_functions(pulse + delta)
+                 - central_costs) / delta_eps
+    return gradients
+
+
+class StateInfidelityWithoutGradient(StateInfidelity):
+    def grad(self):
+        raise NotImplementedError
+
+
+class TripledStateInfidelity(StateInfidelity):
+    def costs(self):
+        return np.full(3, super().costs())
+
+    def grad(self):
+        return np.repeat(super().grad()[:, np.newaxis, :], 3, axis=1)
+
+
+class LegacyPerformanceStatistics:
+    """Pickles like the statistics of earlier versions, which stored the
+    evaluation times in lists. """
+    def __init__(self, state):
+        self.state = state
+
+    def __reduce__(self):
+        return copyreg._reconstructor, (PerformanceStatistics, object, None), \
+            self.state
+
+
+class TestNumericGradient(unittest.TestCase):
+    def setUp(self):
+        np.random.seed(0)
+        self.pulse = np.random.randn(n_time_steps, 2)
+        self.simulator = create_simulator()
+
+    def test_batch_evaluation(self):
+        pulses = np.random.randn(3, n_time_steps, 2)
+        batch_costs = self.simulator.wrapped_cost_functions_batch(pulses)
+        self.assertEqual(batch_costs.shape, (3, 2))
+        for pulse, costs in zip(pulses, batch_costs):
+            np.testing.assert_allclose(
+                costs, self.simulator.wrapped_cost_functions(pulse))
+
+    def test_batched_gradient_matches_loop(self):
+        gradients = self.simulator.numeric_gradient(
+            self.pulse, delta_eps=1e-6)
+        reference = looped_numeric_gradient(
+            self.simulator, self.pulse, delta_eps=1e-6)
+        self.assertEqual(gradients.shape, (n_time_steps, 2, 2))
+        np.testing.assert_allclose(gradients, reference, atol=1e-10)
+
+    def test_symmetric_gradient(self):
+        gradients = self.simulator.numeric_gradient(
+            self.pulse, delta_eps=1e-6, symmetric=True)
+        analytic = self.simulator.wrapped_jac_function(self.pulse)
+        np.testing.assert_allclose(gradients, analytic, atol=1e-7)
+
+    def test_parallel_gradient(self):
+        serial = self.simulator.numeric_gradient(self.pulse, delta_eps=1e-6)
+        parallel = self.simulator.numeric_gradient(
+            self.pulse, delta_eps=1e-6, processes=2)
+        np.testing.assert_allclose(parallel, serial)
+
+    def test_directional_comparison(self):
+        diff_norm, diff_rel = \
+            self.simulator.compare_numeric_to_analytic_gradient(
+                self.pulse, delta_eps=1e-6, symmetric=True,
+                mode='directional')
+        self.assertLess(diff_norm, 1e-6)
+        self.assertLess(diff_rel, 1e-6)
+
+        with self.assertRaises(ValueError):
+            self.simulator.compare_numeric_to_analytic_gradient(
+                self.pulse, mode='unknown')
+
+    def test_directional_comparison_seed(self):
+        global_state = np.random.get_state()[1].copy()
+        first = self.simulator.compare_numeric_to_analytic_gradient(
+            self.pulse, delta_eps=1e-6, mode='directional', rng=1)
+        second = self.simulator.compare_numeric_to_analytic_gradient(
+            self.pulse, delta_eps=1e-6, mode='directional',
+            rng=np.random.default_rng(1))
+        self.assertEqual(first, second)
+        np.testing.assert_array_equal(np.random.get_state()[1], global_state)
+
+    def test_shared_solvers(self):
+        other_simulator = Simulator(
+            solvers=self.simulator.solvers,
+            cost_fktns=self.simulator.cost_fktns
+        )
+        other_pulse = np.random.randn(n_time_steps, 2)
+        costs = self.simulator.wrapped_cost_functions(self.pulse)
+        other_simulator.wrapped_cost_functions(other_pulse)
+        np.testing.assert_allclose(
+            self.simulator.wrapped_cost_functions(self.pulse), costs)
+
+    def test_richardson_extrapolation(self):
+        analytic = self.simulator.wrapped_jac_function(self.pulse)
+        symmetric = self.simulator.numeric_gradient(
+            self.pulse, delta_eps=1e-3, symmetric=True)
+        richardson = self.simulator.numeric_gradient(
+            self.pulse, delta_eps=1e-3, richardson=True)
+        self.assertLess(np.linalg.norm(richardson - analytic),
+                        1e-2 * np.linalg.norm(symmetric - analytic))
+
+        # the step size is chosen automatically by default
+        automatic_step = self.simulator.numeric_gradient(
+            self.pulse, richardson=True)
+        np.testing.assert_allclose(automatic_step, analytic, atol=1e-9)
+        diff_norm, _ = self.simulator.compare_numeric_to_analytic_gradient(
+            self.pulse, richardson=True)
+        self.assertLess(diff_norm, 1e-9)
+
+        np.testing.assert_allclose(
+            self.simulator.numeric_gradient(
+                self.pulse, delta_eps='auto', symmetric=True),
+            analytic, atol=1e-9)
+        with self.assertRaises(ValueError):
+            self.simulator.numeric_gradient(self.pulse, delta_eps='optimal')
+
+    def test_non_contiguous_pulse(self):
+        fortran_pulse = np.asfortranarray(self.pulse)
+        np.testing.assert_array_equal(
+            self.simulator.wrapped_cost_functions(fortran_pulse),
+            self.simulator.wrapped_cost_functions(self.pulse))
+        np.testing.assert_array_equal(
+            self.simulator.wrapped_jac_function(fortran_pulse),
+            self.simulator.wrapped_jac_function(self.pulse))
+
+    def test_repeated_jacobian(self):
+        first_jac = self.simulator.wrapped_jac_function(self.pulse)
+        second_jac = self.simulator.wrapped_jac_function(self.pulse)
+        np.testing.assert_array_equal(first_jac, second_jac)
+
+        self.simulator.cost_fktns = self.simulator.cost_fktns[:1]
+        np.testing.assert_array_equal(
+            self.simulator.wrapped_jac_function(self.pulse),
+            first_jac[:, :1, :])
+
+    def test_cost_functions_appended_in_place(self):
+        cost_fktns = self.simulator.cost_fktns
+        costs = self.simulator.wrapped_cost_functions(self.pulse)
+        jac = self.simulator.wrapped_jac_function(self.pulse)
+
+        self.simulator.cost_fktns = cost_fktns[:1]
+        self.simulator.wrapped_cost_functions(self.pulse)
+        self.simulator.cost_fktns.append(cost_fktns[1])
+        np.testing.assert_array_equal(
+            self.simulator.wrapped_cost_functions(self.pulse), costs)
+
+        self.simulator.cost_fktns = cost_fktns[:1]
+        self.simulator.wrapped_jac_function(self.pulse)
+        self.simulator.cost_fktns.append(cost_fktns[1])
+        np.testing.assert_array_equal(
+            self.simulator.wrapped_jac_function(self.pulse), jac)
+
+    def test_cost_functions_replaced_in_place(self):
+        cost_fktns = list(self.simulator.cost_fktns)
+        tripled_infid = TripledStateInfidelity(
+            solver=cost_fktns[1].solver,
+            target=down
+        )
+        reference = Simulator(
+            solvers=self.simulator.solvers,
+            cost_fktns=[cost_fktns[0], tripled_infid]
+        )
+
+        costs = self.simulator.wrapped_cost_functions(self.pulse)
+        jac = self.simulator.wrapped_jac_function(self.pulse)
+        self.simulator.cost_fktns[1] = tripled_infid
+        np.testing.assert_array_equal(
+            self.simulator.wrapped_cost_functions(self.pulse),
+            reference.wrapped_cost_functions(self.pulse))
+        np.testing.assert_array_equal(
+            self.simulator.wrapped_jac_function(self.pulse),
+            reference.wrapped_jac_function(self.pulse))
+
+        # a scalar cost in place of a vector valued one
+        self.simulator.cost_fktns[1] = cost_fktns[1]
+        np.testing.assert_array_equal(
+            self.simulator.wrapped_cost_functions(self.pulse), costs)
+        np.testing.assert_array_equal(
+            self.simulator.wrapped_jac_function(self.pulse), jac)
+
+    def test_performance_statistics(self):
+        self.simulator.wrapped_cost_functions(self.pulse)
+        self.simulator.wrapped_jac_function(self.pulse)
+        stats = self.simulator.stats
+        self.assertEqual(np.asarray(stats.cost_func_eval_times).shape, (1, 2))
+        self.assertEqual(np.asarray(stats.grad_func_eval_times).shape, (1, 2))
+        self.assertTrue(np.all(np.asarray(stats.grad_func_eval_times) >= 0))
+
+        # the preallocated arrays grow with the number of evaluations
+        self.simulator.stats = PerformanceStatistics(estimated_steps=1)
+        for _ in range(3):
+            self.simulator.wrapped_cost_functions(np.random.randn(
+                n_time_steps, 2))
+        self.assertEqual(
+            self.simulator.stats.cost_func_eval_times.shape, (3, 2))
+        self.assertTrue(
+            np.all(self.simulator.stats.cost_func_eval_times > 0))
+
+    def test_changing_number_of_cost_functions(self):
+        stats = self.simulator.stats
+        stats.start_t_opt = 1.
+        cost_fktns = self.simulator.cost_fktns
+        self.simulator.wrapped_cost_functions(self.pulse)
+        self.simulator.cost_fktns = cost_fktns[:1]
+        self.simulator.wrapped_cost_functions(self.pulse)
+        self.simulator.cost_fktns.append(cost_fktns[1])
+        self.simulator.wrapped_cost_functions(self.pulse)
+        self.simulator.wrapped_jac_function(self.pulse)
+
+        # the statistics are kept and padded with zeros
+        self.assertIs(self.simulator.stats, stats)
+        self.assertEqual(stats.start_t_opt, 1.)
+        eval_times = stats.cost_func_eval_times
+        self.assertEqual(eval_times.shape, (3, 2))
+        self.assertEqual(eval_times[1, 1], 0)
+        self.assertTrue(np.all(eval_times[[0, 1, 2], [0, 0, 1]] > 0))
+
+        # the other way round, the buffer is widened
+        stats = PerformanceStatistics()
+        stats.new_cost_func_eval(1)[:] = 1.
+        stats.new_cost_func_eval(2)[:] = 2.
+        np.testing.assert_array_equal(stats.cost_func_eval_times,
+                                      [[1., 0.], [2., 2.]])
+
+    def test_pickled_performance_statistics(self):
+        self.simulator.wrapped_cost_functions(self.pulse)
+        stats = pickle.loads(pickle.dumps(self.simulator.stats))
+        # only the recorded evaluations are pickled
+        self.assertEqual(stats._cost_func_eval_times.shape, (1, 2))
+        np.testing.assert_array_equal(
+            stats.cost_func_eval_times,
+            self.simulator.stats.cost_func_eval_times)
+        stats.new_cost_func_eval(2)
+        self.assertEqual(stats.cost_func_eval_times.shape, (2, 2))
+
+    def test_legacy_performance_statistics(self):
+        legacy_stats = LegacyPerformanceStatistics({
+            'start_t_opt': None,
+            'end_t_opt': None,
+            'indices': None,
+            'cost_func_eval_times': [[1., 2.], [3., 4.]],
+            'grad_func_eval_times': []
+        })
+        stats = pickle.loads(pickle.dumps(legacy_stats))
+        self.assertIsInstance(stats, PerformanceStatistics)
+        np.testing.assert_array_equal(stats.cost_func_eval_times,
+                                      [[1., 2.], [3., 4.]])
+        self.assertEqual(stats.grad_func_eval_times.shape, (0, 0))
+
+        stats.new_cost_func_eval(2)[:] = [5., 6.]
+        stats.new_grad_func_eval(2)[:] = [7., 8.]
+        self.assertEqual(stats.cost_func_eval_times.shape, (3, 2))
+        np.testing.assert_array_equal(stats.grad_func_eval_times, [[7., 8.]])
+
+    def test_single_precision_gradient(self):
+        gradients = self.simulator.numeric_gradient(
+            self.pulse, delta_eps=1e-6, dtype=np.float32)
+        self.assertEqual(gradients.dtype, np.float32)
+        np.testing.assert_allclose(
+            gradients,
+            self.simulator.numeric_gradient(self.pulse, delta_eps=1e-6),
+            rtol=1e-6, atol=1e-7)
+
+    def test_warmup(self):
+        simulator = create_simulator()
+        warm_simulator = Simulator(
+            solvers=simulator.solvers,
+            cost_fktns=simulator.cost_fktns,
+            optimization_parameters=self.pulse
+        )
+        self.assertEqual(warm_simulator._cost_sizes, [1, 1])
+        self.assertEqual(len(warm_simulator.stats.cost_func_eval_times), 0)
+
+        with self.assertWarns(UserWarning):
+            Simulator(
+                solvers=simulator.solvers,
+                cost_fktns=simulator.cost_fktns,
+                optimization_parameters=np.ones((n_time_steps + 1, 2))
+            )
+
+        # cost functions without gradient are warmed up without warning
+        no_grad_infid = StateInfidelityWithoutGradient(
+            solver=simulator.solvers[1],
+            target=down
+        )
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            no_grad_simulator = Simulator(
+                solvers=simulator.solvers,
+                cost_fktns=[no_grad_infid],
+                optimization_parameters=self.pulse
+            )
+        self.assertEqual(no_grad_simulator._cost_sizes, [1])
+
+    def test_chunked_gradient(self):
+        gradients = self.simulator.numeric_gradient(
+            self.pulse, delta_eps=1e-6, symmetric=True)
+        for chunk_size in [1, 3, 100]:
+            np.testing.assert_allclose(
+                self.simulator.numeric_gradient(
+                    self.pulse, delta_eps=1e-6, symmetric=True,
+                    chunk_size=chunk_size),
+                gradients)
+
+        # the default chunks are bounded by the memory of the pulses
+        self.simulator.numeric_gradient_chunk_bytes = 3 * self.pulse.nbytes
+        batch_sizes = []
+        wrapped_batch = self.simulator.wrapped_cost_functions_batch
+
+        def recording_batch(pulses, *args, **kwargs):
+            batch_sizes.append(len(pulses))
+            return wrapped_batch(pulses, *args, **kwargs)
+
+        self.simulator.wrapped_cost_functions_batch = recording_batch
+        np.testing.assert_allclose(
+            self.simulator.numeric_gradient(
+                self.pulse, delta_eps=1e-6, symmetric=True),
+            gradients)
+        self.assertEqual(max(batch_sizes), 3)
+
+    def test_central_costs(self):
+        central_costs = self.simulator.wrapped_cost_functions(self.pulse)
+        n_evaluations = len(self.simulator.stats.cost_func_eval_times)
+        gradients = self.simulator.numeric_gradient(
+            self.pulse, delta_eps=1e-6, central_costs=central_costs)
+        # only the perturbed pulses are evaluated
+        self.assertEqual(
+            len(self.simulator.stats.cost_func_eval_times) - n_evaluations,
+            self.pulse.size)
+        np.testing.assert_allclose(
+            gradients,
+            self.simulator.numeric_gradient(self.pulse, delta_eps=1e-6))
+
+        # no costs are reused after the cost functions have changed
+        self.simulator.cost_fktns[1].target = up.dag()
+        np.testing.assert_allclose(
+            self.simulator.numeric_gradient(self.pulse, delta_eps=1e-6),
+            self.simulator.wrapped_jac_function(self.pulse), atol=1e-5)